@@ -8,188 +8,451 @@ __version__ = get_versions()['version']
 del get_versions
 
 
-import ast
+import atexit
+import concurrent.futures
 import exiftool
+import functools
+import json
 import logging
+import math
 import os
 import pathlib
+import pickle
 import re
+import sqlite3
+import stat
 import subprocess
+import tempfile
 import typing
-from .utils import find_binary, logger_setup, ensurelist, syscmd, split_at, assert_value_dtype, rename_dict_keys
-from collections import defaultdict
-from xml.etree import ElementTree
+from .utils import find_binary, logger_setup, ensurelist, split_at, assert_value_dtype
+from lxml import etree
+
+try:
+    import orjson
+except ImportError:
+    orjson = None
 
 
 logger = logger_setup(name='photo-tools', level=logging.WARNING)
 
+# Minimum number of files given to each worker process when extracting in parallel, below
+# which the cost of starting another process outweighs the gain
+_MIN_FILES_PER_WORKER = 64
 
-class EXIF(object):
+# Seconds to wait for an exiftool process to exit after being told to stop
+_EXIFTOOL_EXIT_TIMEOUT = 10
+
+_RDF_NS = '{http://www.w3.org/1999/02/22-rdf-syntax-ns#}'
+_RDF_DESCRIPTION = _RDF_NS + 'Description'
+_RDF_ALT = _RDF_NS + 'Alt'
+_RDF_CONTAINERS = {_RDF_NS + 'Bag', _RDF_NS + 'Seq', _RDF_ALT}
+_XML_LANG = '{http://www.w3.org/XML/1998/namespace}lang'
+
+# Namespace prefix of XML tag and attribute names, i.e. the '@{http://...}' in
+# '@{http://...}KeyName'
+_STRIP_NS = re.compile(r'@?\{[^}]*\}')
+
+# Word boundaries in CamelCase names, e.g. 'GPSLatitude' -> 'GPS_Latitude' -> 'gps_latitude'
+_CAMEL1 = re.compile(r'(.)([A-Z][a-z]+)')
+_CAMEL2 = re.compile(r'([a-z0-9])([A-Z])')
+
+# Quick checks of the datatype a raw EXIF value might be coerced to, so that only plausible
+# datatypes need to be tested with `assert_value_dtype()`
+_BOOL_STRINGS = {'true', 't', 'yes', 'y', 'false', 'f', 'no', 'n'}
+_INT_RE = re.compile(r'^\s*[+-]?\d+\s*$')
+_FLOAT_RE = re.compile(r'^\s*[+-]?(\d+\.\d*|\.\d+)([eE][+-]?\d+)?\s*$')
+_DATE_RE = re.compile(r'^\s*\d{4}[./\-_:]\d{2}[./\-_:]\d{2}')
+
+_COLUMN_MAP_PATH = os.path.join(os.path.dirname(__file__), 'data', 'exif_column_map.json')
+
+_PYET: typing.Optional[exiftool.ExifTool] = None
+
+
+def _snake_case(key: str) -> str:
     """
-    Extract and operate on EXIF metadata from a media file or multiple files. Wrapper for
-    `exiftool` by Phil Harvey system command.
+    Convert an exiftool tag name from CamelCase to snake_case.
     """
-    def __init__(self, fpath: typing.Union[str, pathlib.Path]):
-        self.fpath = ensurelist(fpath)
-        self.fpath = [os.path.abspath(f) for f in self.fpath]
-        for f in self.fpath:
-            assert os.path.isfile(f), f'File "{f}" does not exist'
+    new_key = _CAMEL2.sub(r'\1_\2', _CAMEL1.sub(r'\1_\2', key)).lower()
 
-        self.is_batch = len(self.fpath) > 1
-        self.exiftool_bin = find_binary('exiftool', abort=True)
-        logger.info(f'Found exiftool binary "{self.exiftool_bin}"')
+    # Corrections
+    return new_key.replace('i_d', 'id')
 
-    def extract(self, method: str='doni', clean_keys: bool=False, clean_values: bool=False):
-        """
-        Extract EXIF metadata from file or files. Parameter `method` may be one of
-        'doni' or 'pyexiftool'. The `clean_*` toggles will apply `self.clean_keys()` and/or
-        `self.clean_values()` respectively to the output metadata dictionary.
-        """
-        assert method in ['doni', 'pyexiftool']
 
-        def split_cl_filenames(fpaths: typing.Union[str, pathlib.Path],
-                               char_limit: int,
-                               exiftool_bin: typing.Union[str, pathlib.Path]):
-            """
-            Determine at which point to split list of filenames to comply with command-line
-            character limit, and split list of filenames into list of lists, where each sublist
-            represents a batch of files to run `exiftool` on, where the entire call to `exiftool`
-            for that batch will be under the maximum command-line character limit. Files must
-            be broken into batches if there are too many to fit on in command-line command,
-            because the `exiftool` syntax is as follows:
+def _get_pyet() -> exiftool.ExifTool:
+    """
+    Get a long-lived `pyexiftool` ExifTool instance, shared by all `EXIF` objects. It is
+    started the first time it is needed and terminated when the interpreter exits.
+    """
+    global _PYET
 
-            exiftool filename_1 filename_2 filename_3 ... filename_n
+    if _PYET is None:
+        # Only share the instance once it has started, so a failed start is retried next time
+        et = exiftool.ExifTool()
+        et.start()
+        atexit.register(et.terminate)
+        _PYET = et
 
-            With too many files, the raw length of the call to `exiftool` might be over the
-            character limit.
-            """
-            split_idx = []
-            count = 0
-
-            # Get character length of each filename
-            str_lengths = [len(x) for x in fpaths]
-
-            # Get indices to split at depending on character limit
-            for i in range(len(str_lengths)):
-                # Account for two double quotes and a space
-                val = str_lengths[i] + 3
-                count = count + val
-                if count > char_limit - len(exiftool_bin + ' '):
-                    split_idx.append(i)
-                    count = 0
-
-            # Split list of filenames into list of lists at the indices gotten in
-            # the previous step
-            return split_at(fpaths, split_idx)
-
-        def etree_to_dict(t):
-            """
-            Convert XML ElementTree to dictionary.
+    return _PYET
 
-            Source: https://stackoverflow.com/questions/7684333/converting-xml-to-dictionary-using-elementtree
-            """
-            d = {t.tag: {} if t.attrib else None}
-            children = list(t)
-
-            if children:
-                dd = defaultdict(list)
-                for dc in map(etree_to_dict, children):
-                    for k, v in dc.items():
-                        dd[k].append(v)
-                d = {t.tag: {k: v[0] if len(v) == 1 else v
-                             for k, v in dd.items()}}
-
-            if t.attrib:
-                d[t.tag].update(('@' + k, v)
-                                for k, v in t.attrib.items())
-
-            if t.text:
-                text = t.text.strip()
-                if children or t.attrib:
-                    if text:
-                      d[t.tag]['#text'] = text
-                else:
-                    d[t.tag] = text
 
-            return d
+def _argfile_line(arg: typing.Any) -> str:
+    """
+    Format a single argument as a line of an exiftool argfile, in which each line is one
+    argument. Arguments containing line breaks are written as '#[CSTR]' lines, which exiftool
+    unescapes as C strings, so that they are not split into several arguments.
+    """
+    arg = str(arg)
+    if '\n' in arg or '\r' in arg:
+        return '#[CSTR]' + arg.replace('\\', '\\\\').replace('\n', '\\n').replace('\r', '\\r')
 
-        def unnest_http_keynames(d):
-            """
-            Iterate over dictionary and test for key:value pairs where `value` is a
-            dictionary with a key name in format "{http://...}". Iterate down until the
-            terminal value is retrieved, then return that value to the original key name `key`
-            """
-            tmpd = {}
+    return arg
 
-            for k, v in d.items():
-                while isinstance(v, dict) and len(v) == 1:
-                    key = list(v.keys())[0]
-                    if re.search(r'\{http:\/\/.*\}', key):
-                        v = v[key]
-                    else:
-                        break
 
-                tmpd[k] = v
+def _json_dumps(obj: typing.Any) -> bytes:
+    """
+    Serialize `obj` to JSON bytes, with `orjson` if it is installed.
+    """
+    if orjson is not None:
+        return orjson.dumps(obj)
 
-            return tmpd
+    return json.dumps(obj).encode('utf-8')
 
-        if method == 'doni':
-            if not len(self.fpath):
-                return {}
 
-            num_files = len(self.fpath)
-            logger.info(f'Extracting EXIF metadata for {num_files} files')
+def _json_loads(data: bytes) -> typing.Any:
+    """
+    Deserialize JSON bytes, with `orjson` if it is installed.
+    """
+    if orjson is not None:
+        return orjson.loads(data)
 
-            char_limit = 50000
+    return json.loads(data)
 
-            file_batches = split_cl_filenames(self.fpath, char_limit, self.exiftool_bin)
-            logger.info(f'Split {num_files} file(s) into {len(file_batches)} batch(es)')
 
-            commands = []
-            for batch in file_batches:
-                cmd = self.exiftool_bin + ' -xmlFormat ' + ' '.join(['"' + f + '"' for f in batch]) + ' ' + '2>/dev/null'
-                commands.append(cmd)
+@functools.lru_cache(maxsize=None)
+def _load_column_map() -> dict:
+    """
+    Load the mapping of exiftool tag names to clean key names. Read from disk only once per
+    process.
+    """
+    with open(_COLUMN_MAP_PATH, 'r') as f:
+        return json.load(f)
 
-            exifd = {}
-            for i, cmd in enumerate(commands):
-                logger.info(f'Running batch {i+1} of {len(file_batches)} containing {len(file_batches[i])} total files')
 
-                try:
-                    proc = subprocess.Popen(cmd, stdout=subprocess.PIPE, shell=True)
-                    xmlstring, err = proc.communicate()
-                    xmlstring = xmlstring.decode('utf-8')
-                except Exception as e:
-                    logger.exception(f'Unable to execute system command: {cmd}')
-                    raise e
+class _ExifCache(object):
+    """
+    On-disk SQLite cache of extracted EXIF metadata, keyed by file path and invalidated when
+    a file's size or modification time changes.
+    """
+    def __init__(self, cache_path: typing.Union[str, pathlib.Path]):
+        self.conn = sqlite3.connect(str(cache_path))
+        self.conn.execute("""CREATE TABLE IF NOT EXISTS exif (
+                                 path TEXT PRIMARY KEY,
+                                 size INTEGER,
+                                 mtime REAL,
+                                 exif_json BLOB
+                             )""")
+        self.conn.commit()
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, exc_type, exc_value, traceback):
+        self.conn.close()
+
+    def get(self, stats: dict) -> dict:
+        """
+        Get cached metadata for each file in `stats`, a dictionary of {fpath: os.stat_result},
+        whose size and modification time are unchanged. Return a dictionary of
+        {fpath: {tag_name: value}}.
+        """
+        fpaths = list(stats)
+        exifd = {}
+
+        # Stay under SQLite's limit on the number of host parameters in a single query
+        for i in range(0, len(fpaths), 500):
+            batch = fpaths[i:i + 500]
+            placeholders = ', '.join('?' * len(batch))
+            rows = self.conn.execute(f'SELECT path, size, mtime, exif_json FROM exif WHERE path IN ({placeholders})', batch)
+            for fpath, size, mtime, exif_json in rows:
+                st = stats[fpath]
+                if size == st.st_size and mtime == st.st_mtime:
+                    exifd[fpath] = _json_loads(exif_json)
+
+        return exifd
+
+    def put(self, exifd: dict, stats: dict):
+        """
+        Cache metadata in `exifd` for each file also in `stats`, a dictionary of
+        {fpath: os.stat_result} taken before the metadata was extracted.
+        """
+        rows = [(fpath, stats[fpath].st_size, stats[fpath].st_mtime, _json_dumps(d))
+                for fpath, d in exifd.items() if fpath in stats]
+        self.conn.executemany('INSERT OR REPLACE INTO exif VALUES (?, ?, ?, ?)', rows)
+        self.conn.commit()
+
 
+class _StayOpenExiftool(object):
+    """
+    Persistent `exiftool -stay_open` process. Arguments for each command are streamed to
+    the process over stdin, and the output of each command is read back from stdout up to
+    its `{readyN}` marker, so the Perl interpreter is only started once. Parameter `stderr`
+    may be `subprocess.STDOUT` to include exiftool's warnings and errors in the output.
+    """
+    def __init__(self, exiftool_bin: typing.Union[str, pathlib.Path], stderr: int=subprocess.DEVNULL):
+        self.exiftool_bin = exiftool_bin
+        self.proc = subprocess.Popen([exiftool_bin, '-stay_open', 'True', '-@', '-'],
+                                     stdin=subprocess.PIPE,
+                                     stdout=subprocess.PIPE,
+                                     stderr=stderr)
+        self._num_commands = 0
+        self._command_pending = False
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, exc_type, exc_value, traceback):
+        self.close()
+
+    def iter_execute(self, args: list) -> typing.Iterator[bytes]:
+        """
+        Run a single `exiftool` command with arguments `args` and yield its raw output in
+        chunks as it is read from the process, excluding the `{readyN}` marker.
+        """
+        self._num_commands += 1
+        ready = f'{{ready{self._num_commands}}}'.encode('utf-8')
+
+        cmd = '\n'.join(_argfile_line(x) for x in args) + f'\n-execute{self._num_commands}\n'
+        self._command_pending = True
+        self.proc.stdin.write(cmd.encode('utf-8'))
+        self.proc.stdin.flush()
+
+        # Hold back enough trailing bytes that a marker split across two reads is still found
+        holdback = len(ready) - 1
+        pending = b''
+        fd = self.proc.stdout.fileno()
+        while True:
+            chunk = os.read(fd, 65536)
+            if not chunk:
+                raise RuntimeError(f'exiftool process exited before command {self._num_commands} completed')
+
+            pending += chunk
+            idx = pending.find(ready)
+            if idx != -1:
+                self._command_pending = False
+                if idx:
+                    yield pending[:idx]
+
+                return
+
+            if len(pending) > holdback:
+                yield pending[:-holdback]
+                pending = pending[-holdback:]
+
+    def execute(self, args: list) -> bytes:
+        """
+        Run a single `exiftool` command with arguments `args` and return its raw output.
+        """
+        return b''.join(self.iter_execute(args))
+
+    def close(self):
+        """
+        Tell the `exiftool` process to exit and wait for it to do so. If the output of a
+        command was not read in full, e.g. because an error was raised while reading it, kill
+        the process instead, as it may be blocked writing to a full stdout pipe.
+        """
+        if self.proc.poll() is None:
+            if self._command_pending:
+                self.proc.kill()
+            else:
                 try:
-                    root = ElementTree.fromstring(xmlstring)
-                    elist = etree_to_dict(root)
-                    elist = elist['{http://www.w3.org/1999/02/22-rdf-syntax-ns#}RDF']
-                    elist = elist['{http://www.w3.org/1999/02/22-rdf-syntax-ns#}Description']
-                    if isinstance(elist, dict):
-                        elist = [elist]
+                    self.proc.stdin.write(b'-stay_open\nFalse\n')
+                    self.proc.stdin.flush()
+                    self.proc.stdin.close()
+                except BrokenPipeError:
+                    pass
+
+            try:
+                self.proc.wait(timeout=_EXIFTOOL_EXIT_TIMEOUT)
+            except subprocess.TimeoutExpired:
+                logger.warning(f'exiftool process did not exit within {_EXIFTOOL_EXIT_TIMEOUT} seconds, killing it')
+                self.proc.kill()
+                self.proc.wait()
+
+        self.proc.stdin.close()
+        self.proc.stdout.close()
 
-                except Exception as e:
-                    logger.info('Unable to coerce ElementTree to dictionary')
-                    raise e
 
-                for d in elist:
-                    tmpd = {}
+def _element_value(elem: etree._Element) -> typing.Any:
+    """
+    Get the value of a single tag element of `exiftool -xmlFormat` output. List-type tags hold
+    an <rdf:Bag> or <rdf:Seq> container, whose <rdf:li> items are unnested into a list of
+    values, or a single value if there is only one item. Language alternatives hold an
+    <rdf:Alt> container, which is unnested into a dictionary of {language: value}, or a single
+    value if its only item is the default language. Any other element with children, such
+    as an XMP structure, becomes a dictionary of {field_name: value}.
+    """
+    if len(elem) == 1 and elem[0].tag in _RDF_CONTAINERS:
+        container = elem[0]
+        values = [_element_value(li) for li in container]
+
+        if container.tag == _RDF_ALT:
+            langs = [li.get(_XML_LANG, 'x-default') for li in container]
+            if langs == ['x-default']:
+                return values[0]
+
+            return dict(zip(langs, values))
+
+        return values[0] if len(values) == 1 else values
 
-                    # Clean dictionary keys in format @{http://...}KeyName
-                    for k, v in d.items():
-                        new_key = re.sub(r'@?\{.*\}', '', k)
-                        tmpd[new_key] = v
+    if len(elem):
+        return {_STRIP_NS.sub('', child.tag): _element_value(child) for child in elem}
 
-                    # Unnest nested dictionary elements with "http://..." as the keys
-                    tmpd = unnest_http_keynames(tmpd)
+    text = elem.text.strip() if elem.text is not None else None
+    if not text and elem.attrib:
+        return {_STRIP_NS.sub('', k): v for k, v in elem.attrib.items()}
 
+    return text
+
+
+def _description_to_dict(elem: etree._Element) -> dict:
+    """
+    Convert a single rdf:Description element of `exiftool -xmlFormat` output, which holds the
+    metadata of one file, to a dictionary of {tag_name: value}.
+    """
+    tmpd = {_STRIP_NS.sub('', child.tag): _element_value(child) for child in elem}
+    tmpd.update((_STRIP_NS.sub('', k), v) for k, v in elem.attrib.items())
+    return tmpd
+
+
+def _extract_batch(exiftool_bin: typing.Union[str, pathlib.Path], fpaths: list) -> dict:
+    """
+    Extract EXIF metadata for a batch of files with a single `-stay_open` exiftool process,
+    and return a dictionary of {fpath: {tag_name: value}}. Defined at module level so that
+    batches may be dispatched to worker processes by `EXIF.extract()`.
+    """
+    exifd = {}
+
+    # Pass filenames to exiftool in an argfile rather than on the command line, so that all
+    # files may be extracted in a single command regardless of the length of their paths
+    with _StayOpenExiftool(exiftool_bin) as et, \
+            tempfile.NamedTemporaryFile(mode='w', encoding='utf-8', suffix='.args') as argfile:
+        argfile.write('\n'.join(_argfile_line(f) for f in fpaths) + '\n')
+        argfile.flush()
+
+        # Feed exiftool output to the parser as it is read, and pull each rdf:Description
+        # element (one per file) out as soon as it is complete
+        parser = etree.XMLPullParser(events=('end',), tag=_RDF_DESCRIPTION)
+
+        try:
+            for chunk in et.iter_execute(['-xmlFormat', '-@', argfile.name]):
+                parser.feed(chunk)
+
+                for _, elem in parser.read_events():
+                    tmpd = _description_to_dict(elem)
                     fnamekey = os.path.join(tmpd['Directory'], tmpd['FileName'])
                     exifd[fnamekey] = tmpd
 
-                del elist
+                    # Free elements that have already been processed
+                    elem.clear()
+                    while elem.getprevious() is not None:
+                        del elem.getparent()[0]
+
+            parser.close()
+
+        except Exception as e:
+            logger.exception(f'Unable to extract EXIF metadata from {len(fpaths)} files')
+
+            # Errors must be picklable to be sent back from a worker process, which lxml errors
+            # are not, so raise those as a RuntimeError with the same message in every mode
+            try:
+                pickle.dumps(e)
+            except Exception:
+                raise RuntimeError(str(e)) from None
+
+            raise e
+
+    return exifd
+
+
+class EXIF(object):
+    """
+    Extract and operate on EXIF metadata from a media file or multiple files. Wrapper for
+    `exiftool` by Phil Harvey system command.
+
+    If `cache_path` is given, metadata extracted with method 'doni' is cached in a SQLite
+    database at that path, and reused for files whose size and modification time have not
+    changed since they were cached.
+    """
+    _exiftool_bin: typing.Optional[str] = None
+
+    @classmethod
+    def _resolve_bin(cls) -> str:
+        """
+        Find the `exiftool` binary, searching the system only the first time it is needed.
+        """
+        if cls._exiftool_bin is None:
+            cls._exiftool_bin = find_binary('exiftool', abort=True)
+            logger.info(f'Found exiftool binary "{cls._exiftool_bin}"')
+
+        return cls._exiftool_bin
+
+    def __init__(self,
+                 fpath: typing.Union[str, pathlib.Path],
+                 cache_path: typing.Union[str, pathlib.Path]=None):
+        self.fpath = []
+        for f in ensurelist(fpath):
+            f = os.path.abspath(f)
+            if not stat.S_ISREG(os.stat(f).st_mode):
+                raise FileNotFoundError(f'"{f}" is not a regular file')
+
+            self.fpath.append(f)
+
+        self.is_batch = len(self.fpath) > 1
+        self.cache_path = cache_path
+        self.exiftool_bin = type(self)._resolve_bin()
+
+    def extract(self,
+                method: str='doni',
+                clean_keys: bool=False,
+                clean_values: bool=False,
+                parallel: bool=True,
+                workers: int=None):
+        """
+        Extract EXIF metadata from file or files. Parameter `method` may be one of
+        'doni' or 'pyexiftool'. The `clean_*` toggles will apply `self.clean_keys()` and/or
+        `self.clean_values()` respectively to the output metadata dictionary.
+
+        With method 'doni', large sets of files are split across up to `workers` exiftool
+        processes (default: one per CPU) if `parallel` is True.
+        """
+        assert method in ['doni', 'pyexiftool']
+        assert workers is None or workers >= 1, f'Number of workers must be at least 1, got {workers}'
+
+        if method == 'doni':
+            if not len(self.fpath):
+                return {}
+
+            num_files = len(self.fpath)
+            logger.info(f'Extracting EXIF metadata for {num_files} files')
 
+            if self.cache_path is None:
+                exifd = self.__extract_files__(self.fpath, parallel=parallel, workers=workers)
+            else:
+                # Reuse metadata cached by a previous extraction for files that are unchanged,
+                # and only run exiftool on the rest
+                with _ExifCache(self.cache_path) as cache:
+                    stats = {f: os.stat(f) for f in self.fpath}
+                    exifd = cache.get(stats)
+                    logger.info(f'Found cached EXIF metadata for {len(exifd)} of {num_files} files')
+
+                    uncached_fpaths = [f for f in self.fpath if f not in exifd]
+                    if uncached_fpaths:
+                        extracted = self.__extract_files__(uncached_fpaths, parallel=parallel, workers=workers)
+                        cache.put(extracted, stats)
+                        exifd.update(extracted)
+
+                    # Cached and newly extracted files are merged out of order
+                    exifd = {f: exifd[f] for f in self.fpath if f in exifd}
 
             if clean_keys:
                 exifd = self.clean_keys(exifd)
@@ -203,14 +466,81 @@ class EXIF(object):
             return exifd
 
         elif method == 'pyexiftool':
-            with exiftool.ExifTool() as et:
-                if self.is_batch:
-                    exifd = et.get_metadata_batch(self.fpath)
-                else:
-                    exifd = et.get_metadata(self.fpath)
+            et = _get_pyet()
+            if self.is_batch:
+                exifd = et.get_metadata_batch(self.fpath)
+            else:
+                exifd = et.get_metadata(self.fpath[0])
 
             return exifd
 
+    def extract_table(self,
+                      clean_keys: bool=False,
+                      clean_values: bool=False,
+                      parallel: bool=True,
+                      workers: int=None) -> typing.Dict[str, list]:
+        """
+        Extract EXIF metadata from file or files as a table of columns: a dictionary of
+        {tag_name: [value_file_1, value_file_2, ...]}, plus an 'fpath' column of file paths.
+        Files without a given tag have a value of None in that column. Parameters are passed
+        on to `self.extract()`.
+
+        The result may be passed as-is to `pandas.DataFrame()` or `pyarrow.Table.from_pydict()`.
+
+        Example:
+            >>> EXIF(['a.jpg', 'b.jpg']).extract_table()
+            {
+                'fpath': ['/photos/a.jpg', '/photos/b.jpg'],
+                'Make': ['Canon', 'Apple'],
+                'Keywords': [None, ['beach', 'sunset']],
+                ...
+            }
+        """
+        exifd = self.extract(method='doni',
+                             clean_keys=clean_keys,
+                             clean_values=clean_values,
+                             parallel=parallel,
+                             workers=workers)
+
+        num_files = len(exifd)
+        table = {'fpath': list(exifd)}
+        for i, d in enumerate(exifd.values()):
+            for k, v in d.items():
+                if k not in table:
+                    table[k] = [None] * num_files
+
+                table[k][i] = v
+
+        return table
+
+    def __extract_files__(self, fpaths: list, parallel: bool, workers: int):
+        """
+        Run exiftool on `fpaths` and return a dictionary of {fpath: {tag_name: value}}. Files
+        are sharded across several exiftool processes, each of which extracts its own shard of
+        files in a single `-stay_open` command.
+        """
+        num_files = len(fpaths)
+
+        if parallel:
+            workers = workers if workers is not None else (os.cpu_count() or 1)
+            num_batches = min(workers, math.ceil(num_files / _MIN_FILES_PER_WORKER))
+        else:
+            num_batches = 1
+
+        batch_size = math.ceil(num_files / num_batches)
+        file_batches = split_at(fpaths, list(range(batch_size, num_files, batch_size)))
+
+        if len(file_batches) == 1:
+            return _extract_batch(self.exiftool_bin, fpaths)
+
+        logger.info(f'Split {num_files} file(s) into {len(file_batches)} batch(es)')
+        exifd = {}
+        with concurrent.futures.ProcessPoolExecutor(max_workers=len(file_batches)) as executor:
+            for result in executor.map(_extract_batch, [self.exiftool_bin] * len(file_batches), file_batches):
+                exifd.update(result)
+
+        return exifd
+
     def write(self, attrs: dict):
         """
         Write EXIF attribute(s) on a file or list of files, specified in key:value pairs of
@@ -219,40 +549,37 @@ class EXIF(object):
         for k, v in attrs.items():
             self.__is_valid_tag_name__(k)
 
+        # Build the tag arguments once, then apply them to every file
+        tag_args = []
+        for tag_name, tag_value in attrs.items():
+            # Handle any special tag_name cases
+            if tag_name == 'Keywords':
+                # Must be written in format:
+                #     exiftool -keywords=one -keywords=two -keywords=three FILE
+                # Otherwise, comma-separated keywords will be written as a single string
+                if isinstance(tag_value, str):
+                    if ',' in tag_value:
+                        tag_value = tag_value.split(', ')
+
+                if isinstance(tag_value, list):
+                    tag_args += ['-keywords=' + str(x) for x in tag_value]
+                    continue
+
+            tag_args.append(f'-{tag_name}={str(tag_value)}')
+
+        # Write all tags on each file in one command, reusing a single exiftool process for
+        # every file so that each file's result can still be checked
         tracker = {}
-        for fpath in self.fpath:
-            for tag_name, tag_value in attrs.items():
-                default_cmd = f'{self.exiftool_bin} -overwrite_original -{tag_name}="{str(tag_value)}" "{fpath}"'
-
-                # Handle any special tag_name cases
-                if tag_name == 'Keywords':
-                    # Must be written in format:
-                    #     exiftool -keywords=one -keywords=two -keywords=three FILE
-                    # Otherwise, comma-separated keywords will be written as a single string
-                    if isinstance(tag_value, str):
-                        if ',' in tag_value:
-                            tag_value = tag_value.split(', ')
-
-                    if isinstance(tag_value, list):
-                        if len(tag_value) > 1:
-                            kwd_cmd = ' '.join(['-keywords="' + str(x) + '"' for x in tag_value])
-
-                    if 'kwd_cmd' in locals():
-                        cmd = f'{self.exiftool_bin} -overwrite_original {kwd_cmd} "{fpath}"'
-                    else:
-                        cmd = default_cmd
+        with _StayOpenExiftool(self.exiftool_bin, stderr=subprocess.STDOUT) as et:
+            for fpath in self.fpath:
+                res = et.execute(['-overwrite_original'] + tag_args + [fpath]).decode('utf-8')
 
-                else:
-                    cmd = default_cmd
-
-                res = syscmd(cmd, encoding='utf-8')
-
-                # Make sure that tag was appropriately set on `fpath`
+                # Make sure that tags were appropriately set on `fpath`
                 if self.__is_valid_tag_message__(res):
-                    logger.info(f'File "{fpath}" set tag "{tag_name}" to value "{tag_value}"')
+                    logger.info(f'File "{fpath}" set tags {attrs}')
                     tracker[fpath] = True
                 else:
-                    logger.error(f'File "{fpath}" failed to set tag "{tag_name}" to value "{tag_value}" but exiftool system command did not throw an error')
+                    logger.error(f'File "{fpath}" failed to set tags {attrs} but exiftool system command did not throw an error')
                     tracker[fpath] = False
 
         return tracker
@@ -265,25 +592,24 @@ class EXIF(object):
         for tag in tags:
             self.__is_valid_tag_name__(tag)
 
-        for file in self.fpath:
-            logger.info("File: " + file)
-
-            for tag in tags:
-                cmd = '{} -overwrite_original -{}= "{}"'.format(self.exiftool_bin, tag, file)
+        # Clear all tags on each file in one command, reusing a single exiftool process for
+        # every file
+        tag_args = [f'-{tag}=' for tag in tags]
+        with _StayOpenExiftool(self.exiftool_bin, stderr=subprocess.STDOUT) as et:
+            for file in self.fpath:
+                logger.info("File: " + file)
 
                 try:
-                    logger.var('cmd', cmd)
-                    res = syscmd(cmd, encoding='utf-8')
-                    logger.var('res', res)
+                    res = et.execute(['-overwrite_original'] + tag_args + [file]).decode('utf-8')
 
                     if self.__is_valid_tag_message__(res):
-                        logger.info("Success. Tag: %s" % tag)
+                        logger.info("Success. Tags: %s" % ', '.join(tags))
                     else:
-                        logger.error("ExifTool Error. Tag: %s" % tag)
+                        logger.error("ExifTool Error. Tags: %s" % ', '.join(tags))
                         logger.debug('ExifTool output: %s' % str(res))
 
                 except Exception as e:
-                    logger.exception("Failed. Tag: %s" % tag)
+                    logger.exception("Failed. Tags: %s" % ', '.join(tags))
                     raise e
 
     def clean_values(self, exifd: dict):
@@ -308,30 +634,46 @@ class EXIF(object):
                 'sample_float': 11.11,
             }
         """
-        def detect_dtype(val: typing.Any):
+        def detect_dtype(val: typing.Any) -> tuple:
             """
-            Wrap `assert_value_dtype()` in the context of EXIF metadata cleaning. Acceptable
-            return values are ['bool', 'float', 'int', 'date', 'datetime', 'str'].
+            Wrap `assert_value_dtype()` in the context of EXIF metadata cleaning. Return a
+            tuple of (dtype, coerced_value), where acceptable dtypes are ['bool', 'float',
+            'int', 'date', 'datetime', 'str']. Only dtypes that `val` could plausibly be
+            coerced to are tested.
             """
-            valid_dtypes = ['bool', 'float', 'int', 'datetime', 'date', 'str']
+            if isinstance(val, (bool, int, float)):
+                return type(val).__name__, val
+
+            if not isinstance(val, str):
+                return 'str', val
+
+            if val.lower() in _BOOL_STRINGS:
+                valid_dtypes = ['bool']
+            elif _FLOAT_RE.match(val):
+                valid_dtypes = ['float']
+            elif _INT_RE.match(val):
+                valid_dtypes = ['int']
+            elif _DATE_RE.match(val):
+                valid_dtypes = ['datetime'] if len(val.strip()) > 10 else ['date']
+            else:
+                valid_dtypes = []
+
             for dtype in valid_dtypes:
-                if dtype == 'str':
-                    return dtype
-                else:
-                    if assert_value_dtype(val, dtype):
-                        return dtype
+                try:
+                    return dtype, assert_value_dtype(val, dtype, return_coerced_value=True)
+                except ValueError:
+                    pass
 
             # 'Otherwise' condition
-            return 'str'
+            return 'str', val
 
         newexifd = {}
         for fpath, d in exifd.items():
             newexifd[fpath] = {}
 
             for k, v in d.items():
-                dtype = detect_dtype(v)
+                dtype, coerced_value = detect_dtype(v)
                 if dtype in ['bool', 'date', 'datetime', 'int', 'float']:
-                    coerced_value = assert_value_dtype(v, dtype, return_coerced_value=True)
                     if v != coerced_value:
                         newexifd[fpath][k] = coerced_value
                         continue
@@ -345,39 +687,32 @@ class EXIF(object):
         """
         Clean EXIF element names.
         """
-        column_map_json_fpath = os.path.join(os.path.dirname(__file__), 'data', 'exif_column_map.json')
-        with open(column_map_json_fpath, 'r') as f:
-            column_map = ast.literal_eval(f.read())
+        column_map = _load_column_map()
+        column_map_values = set(column_map.values())
 
         newd = {}
-        not_found_keys = []
+        not_found_keys = {}
 
         for fpath, dct in exifd.items():
-            newd[fpath] = rename_dict_keys(dct, column_map)
-            for exif_key in newd[fpath].keys():
-                if exif_key not in column_map.keys() and exif_key not in column_map.values():
-                    logger.warning(f'No mapped name found for key {exif_key} in {column_map_json_fpath}, key not renamed and left as-is')
-                    not_found_keys.append(exif_key)
-
-        if not_found_keys:
-            # Key(s) not in above column map, this means we must rename them manually from
-            # ExifKeyName to exif_key_name.
-            new_keynames = []
-            for key in not_found_keys:
-                new_key = ''
-                for i, char in enumerate(key):
-                    if char == char.upper() and not char.isdigit() and i > 0:
-                        new_key += '_' + char
+            newd[fpath] = {}
+
+            for k, v in dct.items():
+                new_key = column_map.get(k)
+                if new_key is None:
+                    if k in column_map_values:
+                        new_key = k
                     else:
-                        new_key += char
+                        # Key not in above column map, this means we must rename it manually
+                        # from ExifKeyName to exif_key_name.
+                        if k not in not_found_keys:
+                            not_found_keys[k] = _snake_case(k)
 
-                # Corrections
-                new_key = new_key.lower()
-                new_key = new_key.replace('i_d', 'id')
+                        new_key = not_found_keys[k]
 
-                new_keynames.append(new_key)
+                newd[fpath][new_key] = v
 
-            newd[fpath] = rename_dict_keys(newd[fpath], dict(zip(not_found_keys, new_keynames)))
+        for exif_key, new_key in not_found_keys.items():
+            logger.warning(f'No mapped name found for key {exif_key} in {_COLUMN_MAP_PATH}, key renamed to {new_key}')
 
         return newd
 
@@ -392,6 +727,11 @@ class EXIF(object):
                 if char in tag:
                     raise Exception(f'Illegal character "{char}" in tag name "{tag}"')
 
+            # Each tag name is passed to exiftool as one line of an argfile, so whitespace such
+            # as a line break would split it into several arguments
+            if re.search(r'\s', tag):
+                raise Exception(f'Illegal whitespace in tag name {tag!r}')
+
         return True
 
     def __is_valid_tag_message__(self, tagmsg: str):
@@ -35,33 +35,40 @@ class ExtendedLogger(logging.Logger):
         msg = str(msg)
         return f'{indent_str} {arrow_str}{msg}'
 
+    def _pop_format_kwargs(self, kwargs: dict) -> dict:
+        """
+        Remove format parameters of `self._build_message()` from `kwargs` and return them,
+        leaving keyword arguments such as `exc_info` for logging.Logger.
+        """
+        return {k: kwargs.pop(k) for k in ['arrow', 'indent', 'bold'] if k in kwargs}
+
     def info(self, msg: str, *args, **kwargs):
         """
         Override the logging.Logger.info() method.
         """
-        formatted_msg = self._build_message(msg, *args, **kwargs)
-        return super(ExtendedLogger, self).info(formatted_msg)
+        formatted_msg = self._build_message(msg, *args, **self._pop_format_kwargs(kwargs))
+        return super(ExtendedLogger, self).info(formatted_msg, **kwargs)
 
     def warning(self, msg: str, *args, **kwargs):
         """
         Override the logging.Logger.warning() method.
         """
-        formatted_msg = self._build_message(msg, *args, **kwargs)
-        return super(ExtendedLogger, self).warning(formatted_msg)
+        formatted_msg = self._build_message(msg, *args, **self._pop_format_kwargs(kwargs))
+        return super(ExtendedLogger, self).warning(formatted_msg, **kwargs)
 
     def error(self, msg: str, *args, **kwargs):
         """
         Override the logging.Logger.error() method.
         """
-        formatted_msg = self._build_message(msg, *args, **kwargs)
-        return super(ExtendedLogger, self).error(formatted_msg)
+        formatted_msg = self._build_message(msg, *args, **self._pop_format_kwargs(kwargs))
+        return super(ExtendedLogger, self).error(formatted_msg, **kwargs)
 
     def critical(self, msg: str, *args, **kwargs):
         """
         Override the logging.Logger.critical() method.
         """
-        formatted_msg = self._build_message(msg, *args, **kwargs)
-        return super(ExtendedLogger, self).critical(formatted_msg)
+        formatted_msg = self._build_message(msg, *args, **self._pop_format_kwargs(kwargs))
+        return super(ExtendedLogger, self).critical(formatted_msg, **kwargs)
 
 
 def logger_setup(name: str=__name__, level: int=logging.DEBUG) -> logging.Logger:
@@ -223,16 +230,18 @@ def syscmd(cmd: typing.Union[str, list], encoding: str=''):
     Runs a command on the system, waits for the command to finish, and then returns the
     text output of the command. If the command produces no text output, the command's
     return code will be returned instead. Optionally decode output bytestring.
+
+    A string `cmd` is run through the shell, while a list `cmd` is run directly as an argument
+    vector, which needs no shell and no quoting of its arguments.
     """
     p = subprocess.Popen(cmd,
-                         shell=True,
+                         shell=isinstance(cmd, str),
                          stdin=subprocess.PIPE,
                          stdout=subprocess.PIPE,
                          stderr=subprocess.STDOUT,
                          close_fds=True)
 
-    p.wait()
-    output = p.stdout.read()
+    output, _ = p.communicate()
 
     if len(output) > 1:
         if encoding > '' and isinstance(output, bytes):
@@ -0,0 +1,131 @@
+"""
+Stand-in for the `exiftool` binary used by the test suite, implementing just enough of its
+`-stay_open` argfile protocol and `-xmlFormat` output for `photo_tools` to drive it.
+
+Each line of a file passed to it in the format "TagName=Value" is reported as a tag of that
+file. Environment variables change its behavior:
+
+    FAKE_EXIFTOOL_LOG: path of a file to which the files extracted and the arguments of
+        every write are appended
+    FAKE_EXIFTOOL_SPLIT_MARKER: if set, write the `{readyN}` marker in two separate writes
+    FAKE_EXIFTOOL_BAD_XML: if set, write malformed `-xmlFormat` output
+"""
+import json
+import os
+import re
+import sys
+import time
+from xml.sax.saxutils import escape, quoteattr
+
+
+def unescape_cstr(line: str) -> str:
+    """
+    Decode an argfile line prefixed with '#[CSTR]'.
+    """
+    escapes = {'n': '\n', 'r': '\r', 't': '\t', '\\': '\\'}
+    return re.sub(r'\\(.)', lambda m: escapes.get(m.group(1), m.group(1)), line[len('#[CSTR]'):])
+
+
+def parse_argfile_line(line: str) -> str:
+    """
+    Decode a single line of an argfile into an argument.
+    """
+    line = line.rstrip('\n')
+    return unescape_cstr(line) if line.startswith('#[CSTR]') else line
+
+
+def write_log(entry) -> None:
+    """
+    Append `entry` to the log file, if any.
+    """
+    log_path = os.environ.get('FAKE_EXIFTOOL_LOG')
+    if log_path:
+        with open(log_path, 'a') as f:
+            f.write(json.dumps(entry) + '\n')
+
+
+def extract_xml(fpaths: list) -> str:
+    """
+    Build `exiftool -xmlFormat` output for `fpaths`.
+    """
+    out = ["<?xml version='1.0' encoding='UTF-8'?>",
+           "<rdf:RDF xmlns:rdf='http://www.w3.org/1999/02/22-rdf-syntax-ns#'>"]
+    for fpath in fpaths:
+        directory, filename = os.path.split(fpath)
+        out.append(f"<rdf:Description rdf:about={quoteattr(fpath)}"
+                   " xmlns:System='http://ns.exiftool.org/File/System/1.0/'"
+                   " xmlns:IFD0='http://ns.exiftool.org/EXIF/IFD0/1.0/'>")
+        out.append(f' <System:FileName>{escape(filename)}</System:FileName>')
+        out.append(f' <System:Directory>{escape(directory)}</System:Directory>')
+        with open(fpath, 'r') as f:
+            for line in f:
+                if '=' in line:
+                    tag, value = line.rstrip('\n').split('=', 1)
+                    out.append(f' <IFD0:{tag}>{escape(value)}</IFD0:{tag}>')
+
+        out.append('</rdf:Description>')
+
+    out.append('</rdf:RDF>')
+    if os.environ.get('FAKE_EXIFTOOL_BAD_XML'):
+        out.append('</rdf:RDF>')
+
+    return '\n'.join(out) + '\n'
+
+
+def run(args: list) -> str:
+    """
+    Run a single command and return its output.
+    """
+    expanded = []
+    args = iter(args)
+    for arg in args:
+        if arg == '-@':
+            with open(next(args), 'r') as f:
+                expanded += [parse_argfile_line(line) for line in f if line.strip()]
+        else:
+            expanded.append(arg)
+
+    if expanded == ['-ver']:
+        return '12.40\n'
+
+    fpaths = [x for x in expanded if not x.startswith('-')]
+    if '-xmlFormat' in expanded:
+        write_log({'extract': fpaths})
+        return extract_xml(fpaths)
+
+    write_log({'write': expanded})
+    return f'    {len(fpaths)} image files updated\n'
+
+
+def main() -> None:
+    """
+    Read commands from stdin, one argument per line, until told to stop.
+    """
+    stdout = sys.stdout.buffer
+    args = []
+    for line in sys.stdin:
+        arg = parse_argfile_line(line)
+        if arg.startswith('-execute'):
+            stdout.write(run(args).encode('utf-8'))
+            marker = ('{ready' + arg[len('-execute'):] + '}\n').encode('utf-8')
+            if os.environ.get('FAKE_EXIFTOOL_SPLIT_MARKER'):
+                stdout.write(marker[:4])
+                stdout.flush()
+                time.sleep(0.2)
+                stdout.write(marker[4:])
+            else:
+                stdout.write(marker)
+
+            stdout.flush()
+            args = []
+
+        elif arg == '-stay_open':
+            continue
+        elif arg == 'False':
+            break
+        else:
+            args.append(arg)
+
+
+if __name__ == '__main__':
+    main()
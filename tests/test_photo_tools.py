@@ -3,9 +3,64 @@
 """Tests for `photo_tools` package."""
 
 
+import datetime
+import json
+import os
+import stat
+import sys
+import tempfile
+import threading
 import unittest
+from unittest import mock
 
-from photo_tools import photo_tools
+import photo_tools
+from lxml import etree
+
+
+FAKE_EXIFTOOL = os.path.join(os.path.dirname(__file__), 'fake_exiftool.py')
+
+
+class ExiftoolTestCase(unittest.TestCase):
+    """Base class for tests run against the fake `exiftool` in `fake_exiftool.py`."""
+
+    def setUp(self):
+        """Set up a temporary directory holding the fake `exiftool` binary and a log file."""
+        self.tmpdir = tempfile.TemporaryDirectory()
+        self.exiftool_bin = os.path.join(self.tmpdir.name, 'exiftool')
+        with open(self.exiftool_bin, 'w') as f:
+            f.write(f'#!/bin/sh\nexec "{sys.executable}" "{FAKE_EXIFTOOL}" "$@"\n')
+
+        os.chmod(self.exiftool_bin, os.stat(self.exiftool_bin).st_mode | stat.S_IEXEC)
+
+        self.log_path = os.path.join(self.tmpdir.name, 'exiftool.log')
+        env = mock.patch.dict(os.environ, {'FAKE_EXIFTOOL_LOG': self.log_path})
+        env.start()
+        self.addCleanup(env.stop)
+
+        bin_patch = mock.patch.object(photo_tools.EXIF, '_exiftool_bin', self.exiftool_bin)
+        bin_patch.start()
+        self.addCleanup(bin_patch.stop)
+
+    def tearDown(self):
+        """Remove the temporary directory."""
+        self.tmpdir.cleanup()
+
+    def make_photo(self, name: str, tags: dict=None) -> str:
+        """Create a file whose tags will be reported by the fake `exiftool`."""
+        fpath = os.path.join(self.tmpdir.name, name)
+        with open(fpath, 'w') as f:
+            for tag_name, tag_value in (tags or {}).items():
+                f.write(f'{tag_name}={tag_value}\n')
+
+        return fpath
+
+    def read_log(self) -> list:
+        """Read the entries logged by the fake `exiftool`."""
+        if not os.path.isfile(self.log_path):
+            return []
+
+        with open(self.log_path, 'r') as f:
+            return [json.loads(line) for line in f]
 
 
 class TestPhoto_tools(unittest.TestCase):
@@ -19,3 +74,307 @@ class TestPhoto_tools(unittest.TestCase):
 
     def test_000_something(self):
         """Test something."""
+
+
+class TestDescriptionToDict(unittest.TestCase):
+    """Tests for `photo_tools._description_to_dict()`."""
+
+    def parse(self, tags: str) -> dict:
+        """Convert an rdf:Description element holding `tags` to a dictionary."""
+        xml = ("<rdf:RDF xmlns:rdf='http://www.w3.org/1999/02/22-rdf-syntax-ns#'>"
+               "<rdf:Description rdf:about='a.jpg' xmlns:X='http://ns.example.com/X/1.0/'>"
+               f"{tags}"
+               "</rdf:Description>"
+               "</rdf:RDF>")
+        return photo_tools._description_to_dict(etree.fromstring(xml)[0])
+
+    def test_leaf_tags_and_attributes(self):
+        """Leaf tags map to their text, and Description attributes are included."""
+        self.assertEqual(self.parse("<X:Make>Canon</X:Make><X:Empty/>"),
+                         {'Make': 'Canon', 'Empty': None, 'about': 'a.jpg'})
+
+    def test_bag(self):
+        """An rdf:Bag becomes a list of its items, or its only item."""
+        self.assertEqual(self.parse("<X:Subject><rdf:Bag><rdf:li>one</rdf:li></rdf:Bag></X:Subject>")['Subject'],
+                         'one')
+        self.assertEqual(self.parse("<X:Subject><rdf:Bag><rdf:li>one</rdf:li><rdf:li>two</rdf:li></rdf:Bag></X:Subject>")['Subject'],
+                         ['one', 'two'])
+
+    def test_alt(self):
+        """An rdf:Alt becomes a dictionary of {language: value}, or its only default value."""
+        self.assertEqual(self.parse("<X:Title><rdf:Alt><rdf:li xml:lang='x-default'>T</rdf:li></rdf:Alt></X:Title>")['Title'],
+                         'T')
+        self.assertEqual(self.parse("<X:Title><rdf:Alt>"
+                                    "<rdf:li xml:lang='x-default'>T</rdf:li>"
+                                    "<rdf:li xml:lang='de'>D</rdf:li>"
+                                    "</rdf:Alt></X:Title>")['Title'],
+                         {'x-default': 'T', 'de': 'D'})
+
+    def test_struct_with_one_field(self):
+        """An XMP structure keeps its field names, even if it only has one field."""
+        self.assertEqual(self.parse("<X:Struct1 rdf:parseType='Resource'><X:Field>v</X:Field></X:Struct1>")['Struct1'],
+                         {'Field': 'v'})
+
+
+class TestEXIF(ExiftoolTestCase):
+    """Tests for `photo_tools.EXIF.__init__()`."""
+
+    def test_invalid_paths_are_rejected(self):
+        """Missing paths and paths that are not regular files raise FileNotFoundError."""
+        with self.assertRaises(FileNotFoundError):
+            photo_tools.EXIF(os.path.join(self.tmpdir.name, 'missing.jpg'))
+
+        with self.assertRaisesRegex(FileNotFoundError, 'is not a regular file'):
+            photo_tools.EXIF(self.tmpdir.name)
+
+
+class TestStayOpenExiftool(ExiftoolTestCase):
+    """Tests for `photo_tools._StayOpenExiftool`."""
+
+    def test_ready_marker_split_across_reads(self):
+        """A `{readyN}` marker written in two parts still ends each command's output."""
+        with mock.patch.dict(os.environ, {'FAKE_EXIFTOOL_SPLIT_MARKER': '1'}):
+            with photo_tools._StayOpenExiftool(self.exiftool_bin) as et:
+                self.assertEqual(b''.join(et.iter_execute(['-ver'])), b'12.40\n')
+                self.assertEqual(et.execute(['-ver']), b'12.40\n')
+
+
+class TestExtract(ExiftoolTestCase):
+    """Tests for `photo_tools.EXIF.extract()` and `photo_tools.EXIF.extract_table()`."""
+
+    def test_error_while_parsing_does_not_hang(self):
+        """An error raised partway through the output of exiftool reaches the caller."""
+        # Enough files that exiftool's output does not fit in the pipe buffer
+        fpaths = [self.make_photo(f'{i}.jpg', {'Make': 'Canon'}) for i in range(1500)]
+        errors = []
+
+        def extract():
+            try:
+                photo_tools.EXIF(fpaths).extract(parallel=False)
+            except Exception as e:
+                errors.append(e)
+
+        with mock.patch.object(photo_tools, '_description_to_dict', side_effect=KeyError('Directory')):
+            thread = threading.Thread(target=extract, daemon=True)
+            thread.start()
+            thread.join(timeout=30)
+
+        self.assertFalse(thread.is_alive(), 'extract() hung after an error')
+        self.assertEqual(len(errors), 1)
+        self.assertIsInstance(errors[0], KeyError)
+
+    def test_parallel_error_matches_serial_error(self):
+        """An XML error in a worker process reaches the caller as it does in serial mode."""
+        fpaths = [self.make_photo(f'{i}.jpg', {'Make': 'Canon'}) for i in range(200)]
+
+        with mock.patch.dict(os.environ, {'FAKE_EXIFTOOL_BAD_XML': '1'}):
+            with self.assertRaises(RuntimeError) as serial:
+                photo_tools.EXIF(fpaths).extract(parallel=False)
+
+            with self.assertRaises(RuntimeError) as parallel:
+                photo_tools.EXIF(fpaths).extract(workers=3)
+
+        self.assertIn('Extra content at the end of the document', str(serial.exception))
+        self.assertIn('Extra content at the end of the document', str(parallel.exception))
+
+    def test_invalid_workers_is_rejected(self):
+        """Fewer than one worker is rejected rather than dividing by zero."""
+        fpath = self.make_photo('a.jpg')
+
+        for workers in [0, -1]:
+            with self.assertRaises(AssertionError):
+                photo_tools.EXIF(fpath).extract(workers=workers)
+
+    def test_file_name_with_quotes(self):
+        """File names containing quotes are extracted."""
+        fpath = self.make_photo('it\'s "a".jpg', {'Make': 'Canon'})
+
+        exifd = photo_tools.EXIF(fpath).extract(parallel=False)
+
+        self.assertEqual(exifd[fpath]['Make'], 'Canon')
+        self.assertEqual(exifd[fpath]['about'], fpath)
+
+    def test_cache_hit_then_miss_after_mtime_change(self):
+        """Cached metadata is reused until a file's modification time changes."""
+        fpath_a = self.make_photo('a.jpg', {'Make': 'Canon'})
+        fpath_b = self.make_photo('b.jpg', {'Make': 'Apple'})
+        cache_path = os.path.join(self.tmpdir.name, 'cache.db')
+
+        exifd = photo_tools.EXIF([fpath_a, fpath_b], cache_path=cache_path).extract()
+        self.assertEqual(exifd[fpath_a]['Make'], 'Canon')
+        self.assertEqual(self.read_log(), [{'extract': [fpath_a, fpath_b]}])
+
+        # Cache hit: exiftool is not run again
+        exifd = photo_tools.EXIF([fpath_a, fpath_b], cache_path=cache_path).extract()
+        self.assertEqual(exifd[fpath_b]['Make'], 'Apple')
+        self.assertEqual(len(self.read_log()), 1)
+
+        # Cache miss: only the file with a new modification time is extracted again
+        with open(fpath_a, 'w') as f:
+            f.write('Make=Nikon\n')
+
+        st = os.stat(fpath_a)
+        os.utime(fpath_a, (st.st_atime, st.st_mtime + 10))
+
+        exifd = photo_tools.EXIF([fpath_a, fpath_b], cache_path=cache_path).extract()
+        self.assertEqual(exifd[fpath_a]['Make'], 'Nikon')
+        self.assertEqual(exifd[fpath_b]['Make'], 'Apple')
+        self.assertEqual(self.read_log()[1:], [{'extract': [fpath_a]}])
+
+    def test_extract_table_fills_missing_tags_with_none(self):
+        """Each tag becomes a column, with None for files that lack the tag."""
+        fpath_a = self.make_photo('a.jpg', {'Make': 'Canon'})
+        fpath_b = self.make_photo('b.jpg', {'Make': 'Apple', 'Artist': 'Me'})
+
+        table = photo_tools.EXIF([fpath_a, fpath_b]).extract_table()
+
+        self.assertEqual(table['fpath'], [fpath_a, fpath_b])
+        self.assertEqual(table['Make'], ['Canon', 'Apple'])
+        self.assertEqual(table['Artist'], [None, 'Me'])
+        self.assertEqual(table['FileName'], ['a.jpg', 'b.jpg'])
+
+
+    def test_cached_result_follows_input_order(self):
+        """Files are returned in the order given, whichever of them were cached."""
+        fpaths = [self.make_photo(f'{name}.jpg', {'Make': 'Canon'}) for name in 'abc']
+        cache_path = os.path.join(self.tmpdir.name, 'cache.db')
+
+        photo_tools.EXIF(fpaths[1], cache_path=cache_path).extract()
+        exifd = photo_tools.EXIF(fpaths, cache_path=cache_path).extract()
+        self.assertEqual(list(exifd), fpaths)
+
+        exifd = photo_tools.EXIF(fpaths, cache_path=cache_path).extract()
+        self.assertEqual(list(exifd), fpaths)
+
+class TestWrite(ExiftoolTestCase):
+    """Tests for `photo_tools.EXIF.write()` and `photo_tools.EXIF.remove()`."""
+
+    def test_multiline_value_is_a_single_argument(self):
+        """A tag value containing line breaks is not split into several arguments."""
+        fpath = self.make_photo('a.jpg')
+
+        tracker = photo_tools.EXIF(fpath).write({'Comment': 'hello\nvictim.jpg',
+                                                 'Keywords': ['one\r\ntwo', 'back\\slash']})
+
+        self.assertEqual(tracker, {fpath: True})
+        self.assertEqual(self.read_log(), [{'write': ['-overwrite_original',
+                                                      '-Comment=hello\nvictim.jpg',
+                                                      '-keywords=one\r\ntwo',
+                                                      '-keywords=back\\slash',
+                                                      fpath]}])
+
+    def test_tag_name_with_whitespace_is_rejected(self):
+        """Tag names containing whitespace are rejected before exiftool is run."""
+        fpath = self.make_photo('a.jpg')
+
+        for tag in ['Artist\nother.jpg', 'Artist other', 'Artist\t']:
+            with self.assertRaises(Exception):
+                photo_tools.EXIF(fpath).remove(tag)
+
+            with self.assertRaises(Exception):
+                photo_tools.EXIF(fpath).write({tag: 'value'})
+
+        self.assertEqual(self.read_log(), [])
+
+
+class TestCleanValues(unittest.TestCase):
+    """Tests for `photo_tools.EXIF.clean_values()`."""
+
+    def test_values_are_coerced(self):
+        """Numbers, booleans and valid dates are coerced, and anything else is left as is."""
+        exifd = {'a.jpg': {'Int': '+7',
+                           'NegInt': '-7',
+                           'Float': '11.11',
+                           'Bool': 'True',
+                           'DateTime': '2018:03:01 01:28:10',
+                           'Make': 'Canon',
+                           'Width': 5}}
+
+        cleaned = photo_tools.EXIF(__file__).clean_values(exifd)
+
+        self.assertEqual(cleaned, {'a.jpg': {'Int': 7,
+                                             'NegInt': -7,
+                                             'Float': 11.11,
+                                             'Bool': True,
+                                             'DateTime': datetime.datetime(2018, 3, 1, 1, 28, 10),
+                                             'Make': 'Canon',
+                                             'Width': 5}})
+
+    def test_impossible_date_is_left_as_string(self):
+        """A date that does not exist, like February 29 of a non-leap year, stays a string."""
+        exifd = {'a.jpg': {'DateTimeOriginal': '2018:02:29 01:28:10'}}
+
+        cleaned = photo_tools.EXIF(__file__).clean_values(exifd)
+
+        self.assertEqual(cleaned, exifd)
+
+
+class TestCleanKeys(unittest.TestCase):
+    """Tests for `photo_tools.EXIF.clean_keys()`."""
+
+    def test_keys_are_renamed_in_every_file(self):
+        """Mapped and unmapped keys are renamed in every file, without changing the input."""
+        exifd = {'a.jpg': {'Make': 'Canon', 'SomeUnmappedTag': 1},
+                 'b.jpg': {'Make': 'Apple', 'SomeUnmappedTag': 2, 'about': 'b.jpg'}}
+        original = json.loads(json.dumps(exifd))
+
+        cleaned = photo_tools.EXIF(__file__).clean_keys(exifd)
+
+        self.assertEqual(cleaned, {'a.jpg': {'make': 'Canon', 'some_unmapped_tag': 1},
+                                   'b.jpg': {'make': 'Apple', 'some_unmapped_tag': 2, 'about': 'b.jpg'}})
+        self.assertEqual(exifd, original)
+
+
+class TestSnakeCase(unittest.TestCase):
+    """Tests for `photo_tools._snake_case()`."""
+
+    def test_snake_case(self):
+        """CamelCase tag names, including acronyms and 'ID', are converted to snake_case."""
+        for key, expected in [('Make', 'make'),
+                              ('DateTimeOriginal', 'date_time_original'),
+                              ('GPSLatitude', 'gps_latitude'),
+                              ('ImageUniqueID', 'image_unique_id'),
+                              ('Exif2Version', 'exif2_version')]:
+            self.assertEqual(photo_tools._snake_case(key), expected)
+
+
+class TestPyexiftool(unittest.TestCase):
+    """Tests for `photo_tools.EXIF.extract(method='pyexiftool')`."""
+
+    def setUp(self):
+        """Start each test without a shared pyexiftool instance."""
+        pyet_patch = mock.patch.object(photo_tools, '_PYET', None)
+        pyet_patch.start()
+        self.addCleanup(pyet_patch.stop)
+
+        atexit_patch = mock.patch.object(photo_tools.atexit, 'register')
+        self.atexit_register = atexit_patch.start()
+        self.addCleanup(atexit_patch.stop)
+
+    def test_failed_start_is_not_shared(self):
+        """An instance that fails to start is not reused, so the next call starts a new one."""
+        with mock.patch.object(photo_tools.exiftool, 'ExifTool') as ExifTool:
+            ExifTool.return_value.start.side_effect = FileNotFoundError('exiftool')
+            with self.assertRaises(FileNotFoundError):
+                photo_tools._get_pyet()
+
+            self.assertIsNone(photo_tools._PYET)
+            self.atexit_register.assert_not_called()
+
+            ExifTool.return_value.start.side_effect = None
+            et = photo_tools._get_pyet()
+            self.assertIs(photo_tools._PYET, et)
+            self.assertIs(photo_tools._get_pyet(), et)
+            self.assertEqual(ExifTool.call_count, 2)
+
+    def test_single_file(self):
+        """A single file is passed to `get_metadata()` as a path, not a list."""
+        et = mock.Mock()
+        et.get_metadata.return_value = {'EXIF:Make': 'Canon'}
+
+        with mock.patch.object(photo_tools, '_get_pyet', return_value=et):
+            exifd = photo_tools.EXIF(__file__).extract(method='pyexiftool')
+
+        et.get_metadata.assert_called_once_with(__file__)
+        et.get_metadata_batch.assert_not_called()
+        self.assertEqual(exifd, {'EXIF:Make': 'Canon'})